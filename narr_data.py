@@ -4,35 +4,244 @@ Created on Tue Aug 31 11:48:45 2021
 
 @author: Chris Tracy
 
-This module contains two separate functions for plotting meteorological data from the
+This module contains three functions for plotting meteorological data from the
 NCEP North American Regional Reanalysis (NARR) project. Metadata is available at
 https://psl.noaa.gov/data/gridded/data.narr.html . The first function plots the wind speed 
 and geopotential height at a vertical pressure level, while the second function plots the 10-meter
-wind speed and the 2-meter dewpoint temperature. Additional functions for other variables
-and/or pressure levels can be added, as needed.
+wind speed and the 2-meter dewpoint temperature. A multi-panel version of the first function
+plots several pressure levels and/or dates from the same files in one figure. Additional functions
+for other variables and/or pressure levels can be added, as needed.
 """
 
 #Import the necessary global packages
+import atexit
+import os
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
 import matplotlib.pyplot as plt
 from netCDF4 import Dataset
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 from metpy.plots import USCOUNTIES
+from shapely.geometry import box
+try: #Numba is optional. Without it, the unpacking and unit conversions fall back to in-place NumPy operations.
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
-#Short function to convert the time in the file into a string with the year, month, day, hour, and minute.
+#Module constants. Adjust the ranges and intervals of the contour levels for the color scales accordingly.
+_HGT_LEVELS = np.arange(5910, 6000, 5) #Geopotential height contour levels (meters)
+_DEW_LEVELS = np.arange(18.5, 24.0, 0.3) #2-meter dewpoint contour levels (Celsius)
+_HGT_LEVELS.setflags(write = False)
+_DEW_LEVELS.setflags(write = False)
+_KNOTS = np.float32(1.0/0.514) #Conversion factor from m/s to knots
+_KELVIN = np.float32(273.15) #Offset from Kelvin to Celsius
+
+#Short functions to build the map features once, so repeated plots reuse the already loaded geometries.
+#The counties are limited to the ones inside the plot extent, since cartopy would otherwise transform every county.
+@lru_cache(maxsize = None)
+def get_features():
+    return (cfeature.BORDERS, cfeature.COASTLINE, cfeature.OCEAN, cfeature.LAND, cfeature.LAKES, cfeature.RIVERS,
+            cfeature.GSHHSFeature(levels = [1]))
+
+@lru_cache(maxsize = None)
+def get_counties(extent):
+    counties = USCOUNTIES.with_scale('500k')
+    bbox = box(extent[0], extent[2], extent[1], extent[3])
+    geometries = [geom for geom in counties.geometries() if geom.intersects(bbox)]
+    
+    return cfeature.ShapelyFeature(geometries, ccrs.PlateCarree(), **counties.kwargs)
+
+#Open netCDF files are cached by filepath, so repeated plots from the same file skip the cost of opening it.
+#The mapping of each file's dates to their time indices is cached alongside them, once it is needed. Only the
+#most recently used files are kept open; the least recently used file is closed once there are more than
+#_DATASET_CACHE_SIZE.
+_DATASET_CACHE_SIZE = 8
+_CHUNK_CACHE_SIZE = 64*1024*1024 #Minimum chunk cache of each gridded field in an open file (bytes)
+_DATASET_CACHE = OrderedDict() #cache key -> (file, modification time)
+_TIME_INDEX_CACHE = {}
+
+#Short function to get the cache key of a filepath. Local files are keyed by their absolute path, so the same relative
+#path after a change of directory isn't mistaken for the cached file. Other paths (e.g. OPeNDAP URLs) are used as is.
+def _cache_key(path):
+    return os.path.abspath(path) if os.path.isfile(path) else path
+
+#Short function to close a cached netCDF file and drop it from the caches.
+def _evict_dataset(key):
+    file = _DATASET_CACHE.pop(key)[0]
+    _TIME_INDEX_CACHE.pop(key, None)
+    if file.isopen():
+        file.close()
+
+#Short function to open a netCDF file (or reuse the already open file), returning plain arrays instead of masked arrays.
+#A cached file is reopened if it was closed or, for local files, has been rewritten on disk since it was opened.
+def open_dataset(path):
+    key = _cache_key(path)
+    mtime = os.path.getmtime(key) if os.path.isfile(key) else None
+    if key in _DATASET_CACHE:
+        file, cached_mtime = _DATASET_CACHE[key]
+        if file.isopen() and cached_mtime == mtime:
+            _DATASET_CACHE.move_to_end(key)
+            return file
+        _evict_dataset(key)
+    
+    file = Dataset(path)
+    file.set_auto_mask(False)
+    #Give the chunk cache of the gridded fields at least _CHUNK_CACHE_SIZE, and enough to hold all of the chunks that
+    #a (lat, lon) slab spans, so repeated slab reads from those chunks don't decompress them again. The cache only
+    #fills as chunks are read, and is freed when the file is closed by the bounded file cache above.
+    for var in file.variables.values():
+        chunks = var.chunking() if var.ndim >= 3 else 'contiguous'
+        if chunks == 'contiguous':
+            continue
+        size, nelems, preemption = var.get_var_chunk_cache()
+        nchunks = -(-var.shape[-2]//chunks[-2]) * -(-var.shape[-1]//chunks[-1])
+        slab_size = nchunks * int(np.prod(chunks)) * var.dtype.itemsize
+        var.set_var_chunk_cache(size = max(size, slab_size, _CHUNK_CACHE_SIZE), nelems = max(nelems, 2*nchunks + 1), 
+                                preemption = 0.75)
+    _DATASET_CACHE[key] = (file, mtime)
+    while len(_DATASET_CACHE) > _DATASET_CACHE_SIZE:
+        _evict_dataset(next(iter(_DATASET_CACHE)))
+    
+    return file
+
+#Short function to close all of the cached netCDF files. This is run automatically when Python exits.
+@atexit.register
+def close_datasets():
+    while _DATASET_CACHE:
+        _evict_dataset(next(iter(_DATASET_CACHE)))
+
+#Float32 scratch buffers for the wind components, keyed by variable name and shape and reused across plot calls.
+#The key doesn't include the file, so e.g. the pressure-level and 10-meter 'uwnd' share a buffer when their grids
+#match. This is only safe because nothing keeps a reference to a buffer after the read: the winds are copied by
+#barb_grid() before they are plotted. The returned fields get their own arrays, since a reused buffer would be
+#overwritten by the next call.
+_SCRATCH = {}
+
+#Short function to compute out = raw*scale + offset into a float32 array. The packed data's scale and offset and the
+#unit conversion are folded into the one scale and offset, so the grid is unpacked and converted in a single pass.
+#Only 2D (lat, lon) slabs are handled.
+if njit is not None:
+    @njit(parallel = True, fastmath = True, cache = True)
+    def unpack(raw, scale, offset, out):
+        for i in prange(raw.shape[0]):
+            for j in range(raw.shape[1]):
+                out[i, j] = raw[i, j]*scale + offset
+else:
+    def unpack(raw, scale, offset, out):
+        np.multiply(raw, scale, out = out)
+        np.add(out, offset, out = out)
+
+#Short function to read the (lat, lon) slab of a variable at the given index (e.g. np.s_[time, level, :, :]) as
+#float32, converting the units with value*factor + shift. If scratch is True, the slab is read into the variable's
+#reused scratch buffer.
+#The packed data is read with auto-scaling briefly turned off, and its scale and offset are applied in unpack()
+#instead. The variable's setting is restored afterwards, since it lives on a file shared through open_dataset().
+#Like every read from open_dataset(), no valid_range/missing_value masking is applied.
+def read_field(var, index, factor = 1.0, shift = 0.0, scratch = False):
+    auto_scale = var.scale
+    var.set_auto_scale(False)
+    try:
+        raw = var[index]
+    finally:
+        var.set_auto_scale(auto_scale)
+    scale = getattr(var, 'scale_factor', 1.0)
+    offset = getattr(var, 'add_offset', 0.0)
+    if scratch:
+        out = _SCRATCH.get((var.name, raw.shape))
+        if out is None:
+            out = _SCRATCH[(var.name, raw.shape)] = np.empty(raw.shape, dtype = np.float32)
+    else:
+        out = np.empty(raw.shape, dtype = np.float32)
+    unpack(raw, np.float32(scale*factor), np.float32(offset*factor + shift), out)
+    
+    return out
+
+#Short function to convert the time in the file into an array of NumPy datetime64 values.
 def time_convert(file):
-    from datetime import datetime, timedelta
+    hours = np.asarray(file['time'][:]).astype('int64') #In the files, time is in hours past 01/01/1800. More info in metadata.
+    
+    return np.datetime64('1800-01-01T00:00:00') + hours.astype('timedelta64[h]')
+
+#Short function to find the time index of a date string in a netCDF file. The file's mapping of dates to time
+#indices is built on the first lookup and cached until the file is closed.
+def time_index(path, date):
+    file = open_dataset(path)
+    key = _cache_key(path)
+    dates = _TIME_INDEX_CACHE.get(key)
+    if dates is None:
+        dates = _TIME_INDEX_CACHE[key] = {t: i for i, t in enumerate(time_convert(file).astype('datetime64[s]'))}
+    date = np.datetime64(date, 's')
+    try:
+        return dates[date]
+    except KeyError:
+        raise ValueError('Date ' + str(date) + ' was not found in the file.') from None
+
+#Short function to find the index of a pressure level in the file. The levels are sorted in descending order.
+def level_index(levels, level):
+    level_where = int(np.searchsorted(-levels, -level))
+    if level_where == len(levels) or levels[level_where] != level:
+        raise ValueError('Pressure level ' + str(level) + ' mb was not found in the file.')
+    
+    return level_where
+
+#Short function to check the plotting mode. The plot functions call it before reading any data, so a typo fails fast.
+def check_mode(mode):
+    if mode not in ('contourf', 'pcolormesh'):
+        raise ValueError("mode must be either 'contourf' or 'pcolormesh', not " + repr(mode))
+
+#Short function to plot the filled field, either as filled contours or as a (much faster) gridded mesh.
+def plot_field(ax, lon, lat, field, levels, cmap, mode = 'contourf'):
+    check_mode(mode)
+    if mode == 'contourf':
+        return ax.contourf(lon, lat, field, levels, cmap = cmap, transform = ccrs.PlateCarree())
+    else:
+        return ax.pcolormesh(lon, lat, field, cmap = cmap, vmin = levels[0], vmax = levels[-1], shading = 'nearest', 
+                             transform = ccrs.PlateCarree())
+
+#Short function to plot a filled field and the wind barbs, along with the map features and a labeled colorbar, on an axis.
+def plot_panel(ax, lon, lat, uwnd, vwnd, field, levels, label, cmap, barb_color, extent, mode):
+    if extent is None: #Default to the bounds of the data. Setting the extent up front skips cartopy's autoscaling.
+        extent = [float(lon.min()), float(lon.max()), float(lat.min()), float(lat.max())]
+    ax.set_extent(extent, crs = ccrs.PlateCarree())
+    field_plot = plot_field(ax, lon, lat, field, levels, cmap, mode)
+    lon_b, lat_b, u_b, v_b = barb_grid(lon, lat, uwnd, vwnd) #Plot every other barb on the grid
+    ax.barbs(lon_b, lat_b, u_b, v_b, barbcolor = barb_color, linewidth = 2.0, transform = ccrs.PlateCarree())
+    for feature in get_features():
+        ax.add_feature(feature)
+    ax.add_feature(get_counties(tuple(extent)))
+    cbar = plt.colorbar(field_plot, shrink = 0.7, ax = ax)
+    cbar.set_label(label)
+
+#Short function to subsample every other point on the grid into contiguous arrays for the wind barbs. The arrays
+#are always copies (even with step = 1), since the winds passed in are reused scratch buffers.
+def barb_grid(*arrays, step = 2):
+    return tuple(np.array(x[::step, ::step], order = 'C') for x in arrays)
+
+#Short function to read the winds (in knots), the geopotential heights, and the coordinates at a pressure level and date.
+def read_hgt(uwnd_file, vwnd_file, hgt_file, level, date):
+    #Read in the netCDF files and find the index of the date.
+    time_where = time_index(uwnd_file, date)
+    uwnd_file = open_dataset(uwnd_file)
+    vwnd_file = open_dataset(vwnd_file)
+    hgt_file = open_dataset(hgt_file)
     
-    start = datetime(1800, 1, 1) #In the files, time is in units past 01/01/1800. More info in metadata.
-    delta = [timedelta(hours=int(i)) for i in file['time'][:].data] # Time step
-    offset = [(start + x) for x in delta]
-    new_time = [x.strftime('%Y-%m-%d %H:%M:%S') for x in offset]
+    #Get the winds and heights at the specified pressure level and date indices. File index order is 
+    #(time, level, lat, lon).
+    level_where = level_index(uwnd_file.variables['level'][:], level)
+    #Only the (lat, lon) slab is read, as float32 since the plots don't need double precision. The winds are
+    #converted from m/s to knots for the plot while they are unpacked.
+    uwnd = read_field(uwnd_file.variables['uwnd'], np.s_[time_where, level_where, :, :], _KNOTS, scratch = True)
+    vwnd = read_field(vwnd_file.variables['vwnd'], np.s_[time_where, level_where, :, :], _KNOTS, scratch = True)
+    hgt = read_field(hgt_file.variables['hgt'], np.s_[time_where, level_where, :, :])
+    lat = uwnd_file.variables['lat'][:]
+    lon = uwnd_file.variables['lon'][:]
     
-    return new_time
+    return uwnd, vwnd, hgt, lat, lon
 
 def weather_plot_hgt(uwnd_file, vwnd_file, hgt_file, level, date, cmap = 'Reds', barb_color = 'darkblue', 
-                     extent = None):
+                     extent = None, mode = 'contourf'):
     """
     Filenames of the wind component files (first two arguments) are of the following format:
     'uwnd.(year)(month).nc', 'vwnd.(year)(month).nc' (Example: 'uwnd.202203.nc')
@@ -54,7 +263,9 @@ def weather_plot_hgt(uwnd_file, vwnd_file, hgt_file, level, date, cmap = 'Reds',
                 Default is 'Reds'.
     barb_color: the color to plot the wind barbs (string of a Matplotlib color type). Default is 'darkblue'.
     extent    : the desired coordinate bounds of the plot in the following order: [west, east, south, north]
-                (list). Default is None.
+                (list). Default is None, which uses the bounds of the data.
+    mode      : how to plot the filled field, either 'contourf' for filled contours or 'pcolormesh' for a much
+                faster gridded plot without contouring (string). Default is 'contourf'.
 
     Returns
     ----------------
@@ -62,27 +273,9 @@ def weather_plot_hgt(uwnd_file, vwnd_file, hgt_file, level, date, cmap = 'Reds',
     ax  : The axis plot object
     """
     
-    #Read in the netCDF files and convert the time.
-    uwnd_file = Dataset(uwnd_file)
-    vwnd_file = Dataset(vwnd_file)
-    hgt_file = Dataset(hgt_file)
-    time = time_convert(uwnd_file)
-    
-    #Get the winds and heights at the specified pressure level and date indices. File index order is 
-    #(time, level, lat, lon).
-    time_where = np.where(np.array(time) == date)[0][0]
-    level_where = np.where(uwnd_file['level'][:] == level)[0][0]
-    uwnd = uwnd_file['uwnd'][time_where][level_where][:][:].data #In m/s
-    vwnd = vwnd_file['vwnd'][time_where][level_where][:][:].data
-    hgt = hgt_file['hgt'][time_where][level_where][:][:].data
-    lat = uwnd_file['lat'][:].data
-    lon = uwnd_file['lon'][:].data
-    uwnd = uwnd/0.514 #Convert to knots for the plot
-    vwnd = vwnd/0.514
-    
-    uwnd_file.close() #Close the files
-    vwnd_file.close()
-    hgt_file.close()
+    #Read in the data.
+    check_mode(mode)
+    uwnd, vwnd, hgt, lat, lon = read_hgt(uwnd_file, vwnd_file, hgt_file, level, date)
     
     #Original Projection
     # proj = ccrs.LambertConformal(central_longitude=-107.0, central_latitude=50.0, false_easting=5632642.22547, 
@@ -90,27 +283,76 @@ def weather_plot_hgt(uwnd_file, vwnd_file, hgt_file, level, date, cmap = 'Reds',
     
     #Plotting the data
     fig, ax = plt.subplots(figsize = (8, 8), subplot_kw = dict(projection = ccrs.PlateCarree()))
-    height_range = np.arange(5910, 6000, 5) #Adjust the range and intervals for the color scale accordingly
-    if extent is not None: #If provided, adjust the plot extent accordingly
-        ax.set_extent(extent)
-    hgt_plot = ax.contourf(lon, lat, hgt, height_range, cmap = cmap, transform = ccrs.PlateCarree())
-    ax.barbs(lon[::2, ::2], lat[::2, ::2], uwnd[::2, ::2], vwnd[::2, ::2], barbcolor = barb_color, 
-             linewidth = 2.0, transform = ccrs.PlateCarree()) #Plot every other barb on the grid
-    ax.add_feature(cfeature.BORDERS)
-    ax.add_feature(cfeature.COASTLINE)
-    ax.add_feature(cfeature.OCEAN)
-    ax.add_feature(cfeature.LAND)
-    ax.add_feature(cfeature.LAKES)
-    ax.add_feature(cfeature.RIVERS)
-    ax.add_feature(cfeature.GSHHSFeature(levels = [1]))
-    ax.add_feature(USCOUNTIES.with_scale('500k'))
-    cbar = plt.colorbar(hgt_plot, shrink = 0.7, ax = ax)
-    cbar.set_label(str(level) + ' mb Geopotential Height (meters)')
+    plot_panel(ax, lon, lat, uwnd, vwnd, hgt, _HGT_LEVELS, str(level) + ' mb Geopotential Height (meters)', cmap, 
+               barb_color, extent, mode)
     
     return hgt, ax
 
+def weather_plot_hgt_multi(uwnd_file, vwnd_file, hgt_file, levels_dates, ncols = 2, cmap = 'Reds', 
+                           barb_color = 'darkblue', extent = None, mode = 'contourf'):
+    """
+    Plots several pressure levels and/or dates from the same files as the panels of one figure, laid out in a grid
+    with ncols panels per row, so they can be compared side by side. The files are of the same format as for
+    weather_plot_hgt.
+    
+    Parameters
+    ----------------
+    uwnd_file   : filepath of the file containing the u-wind components at the pressure levels (string)
+    vwnd_file   : filepath of the file containing the v-wind components at the pressure levels (string)
+    hgt_file    : filepath of the file containing the geopotential heights at the pressure levels (string)
+    levels_dates: the pressure level in hPa/mb and the date of each panel, in the same formats as for
+                  weather_plot_hgt. Example: [(500, '2022-01-01 12:00:00'), (500, '2022-01-01 18:00:00')]
+                  (list of tuples)
+    ncols       : the number of panels in each row of the figure (int). Default is 2.
+    cmap        : the colormap to use for the geopotential height data (string of a Matplotlib colormap)
+                  Default is 'Reds'.
+    barb_color  : the color to plot the wind barbs (string of a Matplotlib color type). Default is 'darkblue'.
+    extent      : the desired coordinate bounds of the plots in the following order: [west, east, south, north]
+                  (list). Default is None, which uses the bounds of the data.
+    mode        : how to plot the filled field, either 'contourf' for filled contours or 'pcolormesh' for a much
+                  faster gridded plot without contouring (string). Default is 'contourf'.
+
+    Returns
+    ----------------
+    hgts : The gridded geopotential height data of each panel (list of 2D arrays)
+    axes : The axis plot objects of the panels (list)
+    """
+    
+    check_mode(mode)
+    if len(levels_dates) == 0:
+        raise ValueError('levels_dates must contain at least one (level, date) pair.')
+    if ncols < 1:
+        raise ValueError('ncols must be at least 1, not ' + str(ncols))
+    levels = open_dataset(uwnd_file).variables['level'][:] #Check every panel's level and date before plotting
+    for level, date in levels_dates:
+        level_index(levels, level)
+        time_index(uwnd_file, date)
+    
+    #Plotting the data. Any panels left over in the last row are hidden.
+    nrows = -(-len(levels_dates)//ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize = (8*ncols, 8*nrows), squeeze = False, 
+                             subplot_kw = dict(projection = ccrs.PlateCarree()))
+    axes = list(axes.flat)
+    for ax in axes[len(levels_dates):]:
+        ax.set_visible(False)
+    axes = axes[:len(levels_dates)]
+    
+    hgts = []
+    try:
+        for ax, (level, date) in zip(axes, levels_dates):
+            uwnd, vwnd, hgt, lat, lon = read_hgt(uwnd_file, vwnd_file, hgt_file, level, date)
+            plot_panel(ax, lon, lat, uwnd, vwnd, hgt, _HGT_LEVELS, str(level) + ' mb Geopotential Height (meters)', 
+                       cmap, barb_color, extent, mode)
+            ax.set_title(str(level) + ' mb, ' + str(date) + ' UTC')
+            hgts.append(hgt)
+    except Exception:
+        plt.close(fig) #Don't leave a half-drawn figure open in pyplot
+        raise
+    
+    return hgts, axes
+
 def weather_plot_dew(uwnd_file, vwnd_file, dew_file, date, cmap = 'Greens', barb_color = 'blue', 
-                     extent = None):
+                     extent = None, mode = 'contourf'):
     """
     Filenames of the wind component files (first two arguments) are of the following format:
     'uwnd.10m.(year).nc', 'vwnd.10m.(year).nc' (Example: 'uwnd.10m.2022.nc')
@@ -131,33 +373,31 @@ def weather_plot_dew(uwnd_file, vwnd_file, dew_file, date, cmap = 'Greens', barb
                 Default is 'Greens'.
     barb_color: the color to plot the wind barbs (string of a Matplotlib color type). Default is 'blue'.
     extent    : the desired coordinate bounds of the plot in the following order: [west, east, south, north]
-                (list). Default is None.
+                (list). Default is None, which uses the bounds of the data.
+    mode      : how to plot the filled field, either 'contourf' for filled contours or 'pcolormesh' for a much
+                faster gridded plot without contouring (string). Default is 'contourf'.
 
     Returns
     ----------------
-    dew : The gridded 2-meter dewpoint data (2D array)
+    dew : The gridded 2-meter dewpoint data in degrees Celsius (2D array)
     ax  : The axis plot object
     """
     
-    #Read in the netCDF files and convert the time.
-    uwnd_file = Dataset(uwnd_file)
-    vwnd_file = Dataset(vwnd_file)
-    dew_file = Dataset(dew_file)
-    time = time_convert(uwnd_file)
+    #Read in the netCDF files and find the index of the date.
+    check_mode(mode)
+    time_where = time_index(uwnd_file, date)
+    uwnd_file = open_dataset(uwnd_file)
+    vwnd_file = open_dataset(vwnd_file)
+    dew_file = open_dataset(dew_file)
     
     #Get the winds at the specified pressure level and date indices. File index order is (time, level, lat, lon).
-    time_where = np.where(np.array(time) == date)[0][0]
-    uwnd = uwnd_file['uwnd'][time_where][:][:].data
-    vwnd = vwnd_file['vwnd'][time_where][:][:].data
-    dew = dew_file['dpt'][time_where][:][:].data #The data is originally in Kelvin
-    lat = uwnd_file['lat'][:].data
-    lon = uwnd_file['lon'][:].data
-    uwnd = uwnd/0.514 #Convert to knots for the plot
-    vwnd = vwnd/0.514
-    
-    uwnd_file.close() #Close the files
-    vwnd_file.close()
-    dew_file.close()
+    #The data is read as float32 since the plots don't need double precision. The winds are converted from m/s to
+    #knots and the dewpoint from Kelvin to Celsius for the plot while they are unpacked.
+    uwnd = read_field(uwnd_file.variables['uwnd'], np.s_[time_where, :, :], _KNOTS, scratch = True)
+    vwnd = read_field(vwnd_file.variables['vwnd'], np.s_[time_where, :, :], _KNOTS, scratch = True)
+    dew = read_field(dew_file.variables['dpt'], np.s_[time_where, :, :], shift = -_KELVIN)
+    lat = uwnd_file.variables['lat'][:]
+    lon = uwnd_file.variables['lon'][:]
     
     #Original projection
     # proj = ccrs.LambertConformal(central_longitude=-107.0, central_latitude=50.0, false_easting=5632642.22547, 
@@ -165,22 +405,7 @@ def weather_plot_dew(uwnd_file, vwnd_file, dew_file, date, cmap = 'Greens', barb
     
     #Plotting the data. The 2-meter dewpoint is plotted in degrees Celsius.
     fig, ax = plt.subplots(figsize = (8,8), subplot_kw = dict(projection = ccrs.PlateCarree()))
-    if extent is not None: #If provided, adjust the plot extent accordingly
-        ax.set_extent(extent)
-    dew_range = np.arange(18.5, 24.0, 0.3) #Adjust the range and intervals for the color scale accordingly
-    dew_plot = ax.contourf(lon, lat, dew - 273.15, dew_range, transform = ccrs.PlateCarree(), cmap = cmap)
-    ax.barbs(lon[::2, ::2], lat[::2, ::2], uwnd[::2, ::2], vwnd[::2, ::2], barbcolor = barb_color, 
-             linewidth = 2.0, transform = ccrs.PlateCarree()) #Plot every other barb on the grid
-    ax.add_feature(cfeature.BORDERS)
-    ax.add_feature(cfeature.COASTLINE)
-    ax.add_feature(cfeature.OCEAN)
-    ax.add_feature(cfeature.LAND)
-    ax.add_feature(cfeature.LAKES)
-    ax.add_feature(cfeature.RIVERS)
-    ax.add_feature(cfeature.GSHHSFeature(levels = [1]))
-    ax.add_feature(USCOUNTIES.with_scale('500k'))
-    cbar = plt.colorbar(dew_plot, shrink = 0.7, ax = ax)
-    cbar.set_label('2-Meter Dewpoint (Celsius)')
+    plot_panel(ax, lon, lat, uwnd, vwnd, dew, _DEW_LEVELS, '2-Meter Dewpoint (Celsius)', cmap, barb_color, extent, mode)
     
     return dew, ax
 